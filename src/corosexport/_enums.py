@@ -0,0 +1,102 @@
+"""Coros activity type and export format enums.
+
+Kept apart from the data models and free of heavy imports, for code that
+only needs the enums. They are re-exported from corosexport.models.
+"""
+
+from enum import Enum
+from typing import Optional
+
+# Mapping from Coros sport type codes to ActivityType string names
+_SPORT_TYPE_MAP = {
+    100: "RUNNING",
+    101: "TRAIL_RUNNING",
+    200: "CYCLING",
+    201: "MOUNTAIN_BIKING",
+    203: "GRAVEL_BIKING",
+    204: "MOUNTAIN_BIKING",
+    300: "SWIMMING",
+    301: "POOL_SWIM",
+    104: "HIKING",
+    400: "GYM_CARDIO",
+    402: "STRENGTH",
+    904: "YOGA",
+    500: "TRIATHLON",
+    10000: "TRIATHLON",
+}
+
+_FILE_TYPE_MAP = {
+    0: "csv",
+    1: "gpx",
+    2: "kml",
+    3: "tcx",
+    4: "fit",
+}
+
+# Reverse lookups; where several codes map to one name, the first code wins
+_SPORT_TYPE_REVERSE = {name: code for code, name in reversed(_SPORT_TYPE_MAP.items())}
+_FILE_TYPE_REVERSE = {name: code for code, name in reversed(_FILE_TYPE_MAP.items())}
+
+class ActivityType(str, Enum):
+    """Supported Coros activity types (using Coros sport type codes)."""
+    sport_code: Optional[int]
+    
+    RUNNING = "RUNNING"
+    TRAIL_RUNNING = "TRAIL_RUNNING"
+    CYCLING = "CYCLING"
+    MOUNTAIN_BIKING = "MOUNTAIN_BIKING"
+    GRAVEL_BIKING = "GRAVEL_BIKING"
+    SWIMMING = "SWIMMING"
+    POOL_SWIM = "POOL_SWIM"
+    HIKING = "HIKING"
+    GYM_CARDIO = "GYM_CARDIO"
+    STRENGTH = "STRENGTH"
+    YOGA = "YOGA"
+    TRIATHLON = "TRIATHLON"
+    OTHER = "OTHER"
+    
+    @classmethod
+    def from_sport_type(cls, sport_type: int) -> "ActivityType":
+        return _SPORT_TYPE_MEMBERS.get(sport_type, cls.OTHER)
+    
+    def to_sport_type(self) -> Optional[int]:
+        return self.sport_code
+    
+    @classmethod
+    def _missing_(cls, value):
+        """Return OTHER for unknown activity types."""
+        return cls.OTHER
+
+class ExportFormat(str, Enum):
+    """Supported export formats."""
+    file_code: Optional[int]
+    
+    CSV = "csv"
+    GPX = "gpx"
+    KML = "kml"
+    TCX = "tcx"
+    FIT = "fit"
+
+    @classmethod
+    def from_file_type(cls, sport_type: int) -> "ExportFormat":
+        member = _FILE_TYPE_MEMBERS.get(sport_type)
+        if member is None:
+            raise ValueError(f"Unknown Coros file type code {sport_type}")
+        return member
+    
+    def to_file_type(self) -> Optional[int]:
+        return self.file_code
+
+
+# Resolve each member's code once; OTHER has none
+for _activity_type in ActivityType:
+    _activity_type.sport_code = _SPORT_TYPE_REVERSE.get(_activity_type.value)
+for _export_format in ExportFormat:
+    _export_format.file_code = _FILE_TYPE_REVERSE.get(_export_format.value)
+del _activity_type, _export_format
+
+
+# Code to member lookups, so a code resolves to its member with a single
+# int-keyed probe rather than code -> name -> member
+_SPORT_TYPE_MEMBERS = {code: ActivityType(name) for code, name in _SPORT_TYPE_MAP.items()}
+_FILE_TYPE_MEMBERS = {code: ExportFormat(name) for code, name in _FILE_TYPE_MAP.items()}
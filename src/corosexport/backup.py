@@ -2,10 +2,16 @@
 
 import json
 import logging
+import os
+import queue
+import threading
+from collections import Counter
 from pathlib import Path
-from typing import Optional, Set
+from typing import IO, AbstractSet, Optional, Set, Union
 from datetime import datetime
 
+
+from corosexport import _json
 from corosexport.client import CorosClient, CorosAPIError
 from corosexport.models import BackupState, ActivitySummary, ExportFormat
 
@@ -13,6 +19,23 @@ logger = logging.getLogger(__name__)
 
 STATE_FILE_NAME = ".corosexport_state.json"
 
+# Append-only journal of activities downloaded since the last state snapshot
+WAL_FILE_NAME = ".corosexport_state.wal"
+
+# Number of journal entries after which they are folded into the snapshot
+WAL_COMPACT_THRESHOLD = 500
+
+# Downloads are network-bound, so a handful of threads hides most of the latency
+DEFAULT_MAX_WORKERS = 8
+
+# Upper bound on items buffered between two pipeline stages
+PIPELINE_QUEUE_SIZE = 64
+
+DEFAULT_FORMATS = [ExportFormat.FIT, ExportFormat.TCX]
+
+# Marks the end of a pipeline stage's output
+_STAGE_DONE = object()
+
 
 class BackupManager:
     """Manages incremental backups of Coros activities."""
@@ -22,6 +45,9 @@ class BackupManager:
         client: CorosClient,
         backup_dir: Path,
         formats: Optional[list[ExportFormat]] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        full_scan: bool = False,
+        compress_metadata: bool = False,
     ):
         """Initialize backup manager.
         
@@ -29,11 +55,35 @@ class BackupManager:
             client: Authenticated Coros API client
             backup_dir: Directory to store backed up activities
             formats: List of export formats (default: [FIT, TCX])
+            max_workers: Number of files downloaded in parallel (default: 8)
+            full_scan: List all activities instead of stopping at the first
+                page of already backed up ones. Use this to retry older
+                activities that failed to download in a previous backup.
+            compress_metadata: Write metadata sidecars compressed with zstd
+                (``*-metadata.json.zst``). Requires the ``zstandard`` package.
         """
         self.client = client
         self.backup_dir = Path(backup_dir)
-        self.formats = formats or [ExportFormat.FIT, ExportFormat.TCX]
+        # Without duplicates, as two workers must never write the same file
+        self.formats = list(dict.fromkeys(formats or DEFAULT_FORMATS))
+        self.max_workers = max(1, max_workers)
+        self.full_scan = full_scan
+        self._zstd = None
+        if compress_metadata:
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError(
+                    "compress_metadata requires zstandard: pip install 'corosexport[zstd]'"
+                ) from e
+            # Only used by the pipeline's writer stage, so one instance is enough
+            self._zstd = zstandard.ZstdCompressor(level=3)
         self.state_file = self.backup_dir / STATE_FILE_NAME
+        self.wal_file = self.backup_dir / WAL_FILE_NAME
+        self._wal: Optional[IO[str]] = None
+        self._dirty_since_save = 0
+        # Set by _load_state() for state files that predate format tracking
+        self._legacy_state = False
         
         # Ensure backup directory exists
         self.backup_dir.mkdir(parents=True, exist_ok=True)
@@ -44,13 +94,16 @@ class BackupManager:
     def _load_state(self) -> BackupState:
         """Load backup state from disk.
         
+        Reads the last snapshot, then replays any downloads journaled since.
+        
         Returns:
             BackupState object (new or loaded from file)
         """
+        state = None
         if self.state_file.exists():
             try:
-                with open(self.state_file, "r") as f:
-                    data = json.load(f)
+                with open(self.state_file, "rb") as f:
+                    data = _json.loads(f.read())
                     # Reconstruct BackupState with proper date parsing
                     state = BackupState(
                         last_backup_timestamp=datetime.fromisoformat(
@@ -58,130 +111,446 @@ class BackupManager:
                         ),
                         total_activities_backed_up=data.get("total_activities_backed_up", 0),
                         last_synced_activity_id=data.get("last_synced_activity_id"),
-                        downloaded_activity_ids=set(data.get("downloaded_activity_ids", [])),
+                        downloaded_formats=self._parse_downloaded_formats(data),
                     )
+                    self._legacy_state = "downloaded_formats" not in data
                     logger.info(f"Loaded backup state with {len(state.downloaded_activity_ids)} activities")
-                    return state
             except (json.JSONDecodeError, IOError) as e:
                 logger.warning(f"Failed to load state file: {e}. Starting fresh.")
         
-        # Create new state
-        return BackupState(
-            last_backup_timestamp=datetime.now(),
-            total_activities_backed_up=0,
-            downloaded_activity_ids=set(),
-        )
+        if state is None:
+            # Create new state
+            state = BackupState(
+                last_backup_timestamp=datetime.now(),
+                total_activities_backed_up=0,
+                downloaded_formats={},
+            )
+        
+        self._replay_wal(state)
+        return state
     
-    def _save_state(self) -> None:
-        """Save backup state to disk."""
-        try:
-            data = {
-                "last_backup_timestamp": self.state.last_backup_timestamp.isoformat(),
-                "total_activities_backed_up": self.state.total_activities_backed_up,
-                "last_synced_activity_id": self.state.last_synced_activity_id,
-                "downloaded_activity_ids": list(self.state.downloaded_activity_ids),
+    @staticmethod
+    def _parse_downloaded_formats(data: dict) -> dict[str, frozenset[str]]:
+        """Read the downloaded formats per activity from a state snapshot.
+        
+        State files written before formats were tracked only list activity
+        IDs. Those activities are assumed to have the default formats. The
+        first backup after the migration lists all activities, so a format
+        whose file is missing on disk still gets downloaded.
+        
+        Args:
+            data: Parsed state file
+            
+        Returns:
+            Mapping of activity ID to downloaded format values
+        """
+        if "downloaded_formats" in data:
+            return {
+                activity_id: frozenset(formats)
+                for activity_id, formats in data["downloaded_formats"].items()
             }
-            with open(self.state_file, "w") as f:
-                json.dump(data, f, indent=2)
+        
+        legacy_formats = frozenset(fmt.value for fmt in DEFAULT_FORMATS)
+        return dict.fromkeys(data.get("downloaded_activity_ids", []), legacy_formats)
+    
+    def _replay_wal(self, state: BackupState) -> None:
+        """Apply downloads journaled by an interrupted backup to the state.
+        
+        Args:
+            state: State loaded from the last snapshot
+        """
+        if not self.wal_file.exists():
+            return
+        
+        replayed = 0
+        # Byte offset just past the last complete line
+        valid_end = 0
+        torn = False
+        try:
+            with open(self.wal_file, "rb") as f:
+                for line in f:
+                    # A torn last line is a write that never completed
+                    if not line.endswith(b"\n"):
+                        torn = True
+                        break
+                    valid_end += len(line)
+                    # "<activity_id> <format> [<format> ...]"
+                    fields = line.decode("utf-8", errors="replace").split()
+                    if len(fields) < 2:
+                        continue
+                    state.mark_downloaded(fields[0], fields[1:])
+                    replayed += 1
+            
+            if torn:
+                # Cut the partial entry off, or the next appended entry would
+                # continue it and be read back as garbage
+                os.truncate(self.wal_file, valid_end)
+        except IOError as e:
+            logger.warning(f"Failed to read state journal: {e}")
+        
+        if replayed:
+            logger.info(f"Recovered {replayed} downloads from an interrupted backup")
+    
+    def _record_download(self, activity_id: str, formats: set[str]) -> None:
+        """Journal the formats downloaded for an activity.
+        
+        Each entry is synced to disk right away, so an interrupted backup
+        resumes where it stopped. The journal is folded into the state
+        snapshot every ``WAL_COMPACT_THRESHOLD`` entries.
+        
+        Args:
+            activity_id: ID of the activity that was downloaded
+            formats: Export format values that were downloaded
+        """
+        try:
+            if self._wal is None:
+                self._wal = open(self.wal_file, "a")
+            self._wal.write(f"{activity_id} {' '.join(sorted(formats))}\n")
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._dirty_since_save += 1
+        except IOError as e:
+            logger.error(f"Failed to journal activity {activity_id}: {e}")
+        
+        if self._dirty_since_save >= WAL_COMPACT_THRESHOLD:
+            self._compact_state()
+    
+    def _close_wal(self) -> None:
+        """Close the journal file if it is open."""
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+    
+    def _compact_state(self) -> None:
+        """Write a state snapshot and drop the journal it supersedes."""
+        self._close_wal()
+        # Reset even if the save fails, so a failing disk is retried once per
+        # threshold instead of on every download; the journal stays valid
+        self._dirty_since_save = 0
+        if not self._save_state():
+            return
+        
+        try:
+            self.wal_file.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to remove state journal: {e}")
+    
+    def _save_state(self) -> bool:
+        """Save backup state to disk.
+        
+        The snapshot is written to a temporary file first and then moved into
+        place, so a crash never leaves a truncated state file behind.
+        
+        Returns:
+            True if the state was saved
+        """
+        try:
+            data = self.state.to_dict()
+            tmp_file = self.state_file.with_name(f"{self.state_file.name}.tmp")
+            with open(tmp_file, "wb") as f:
+                f.write(_json.dumps(data, indent=True))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.state_file)
             logger.debug("Backup state saved")
+            return True
         except IOError as e:
             logger.error(f"Failed to save state file: {e}")
+            return False
     
     def run_backup(self) -> dict:
         """Run an incremental backup of all activities.
         
+        The backup runs as a three-stage pipeline connected by bounded queues:
+        a listing thread queues each file that still has to be downloaded,
+        ``max_workers`` download threads fetch them, so the formats of one
+        activity download side by side, and the calling thread records each
+        file in the backup state and writes the metadata sidecar once all
+        files of an activity are done.
+        
         Returns:
             Dictionary with backup statistics
         """
         logger.info("Starting backup")
-        global stats
+        # Each stage counts into its own Counter; they are merged at the end
+        listing_counts: Counter[str] = Counter()
+        activity_counts: Counter[str] = Counter()
+        format_counts: Counter[str] = Counter()
+        # Finished and successful file downloads of partly done activities
+        in_progress: dict[str, Counter] = {}
+        
+        pending: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        results: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        abort = threading.Event()
+        
+        workers = [
+            threading.Thread(
+                target=self._list_activities,
+                args=(pending, results, listing_counts, abort),
+                name="corosexport-list",
+                daemon=True,
+            )
+        ]
+        workers.extend(
+            threading.Thread(
+                target=self._download_activities,
+                args=(pending, results, abort),
+                name=f"corosexport-download-{i}",
+                daemon=True,
+            )
+            for i in range(self.max_workers)
+        )
+        for worker in workers:
+            worker.start()
+        
+        error: Optional[BaseException] = None
+        try:
+            running = self.max_workers
+            while running:
+                item = results.get()
+                if item is _STAGE_DONE:
+                    running -= 1
+                    continue
+                
+                activity, fmt, file_count, outcome = item
+                if isinstance(outcome, BaseException):
+                    # Stop feeding the pipeline but keep draining it
+                    if error is None:
+                        error = outcome
+                        abort.set()
+                    continue
+                
+                self._record_result(
+                    activity, fmt, file_count, outcome,
+                    in_progress, activity_counts, format_counts,
+                )
+        finally:
+            abort.set()
+        
+        for worker in workers:
+            worker.join()
+        
+        if error is not None:
+            # Downloads so far are journaled and get replayed on the next run
+            self._close_wal()
+            if isinstance(error, CorosAPIError):
+                logger.error(f"Backup failed: {error}")
+            raise error
+        
+        # Update backup timestamp and save state
+        self.state.last_backup_timestamp = datetime.now()
+        self._compact_state()
+        
         stats = {
-            "activities_found": 0,
-            "activities_skipped": 0,
-            "activities_downloaded": 0,
-            "activities_failed": 0,
-            "formats_downloaded": {},
+            "activities_found": listing_counts["found"],
+            "activities_skipped": listing_counts["skipped"],
+            "activities_downloaded": activity_counts["downloaded"],
+            "activities_failed": activity_counts["failed"],
+            "formats_downloaded": dict(format_counts),
         }
+        logger.info(f"Backup completed: {stats['activities_downloaded']} new, "
+                   f"{stats['activities_skipped']} skipped, {stats['activities_failed']} failed")
+        
+        return stats
+    
+    def _record_result(
+        self,
+        activity: ActivitySummary,
+        fmt: ExportFormat,
+        file_count: int,
+        downloaded: bool,
+        in_progress: dict[str, Counter],
+        activity_counts: Counter,
+        format_counts: Counter,
+    ) -> None:
+        """Pipeline stage 3: record one finished file download.
+        
+        Once all files of the activity are done, its metadata is saved and
+        the activity is counted as downloaded or failed.
+        
+        Args:
+            activity: Activity the file belongs to
+            fmt: Format of the file
+            file_count: Number of files queued for the activity
+            downloaded: Whether the download succeeded
+            in_progress: Finished and successful downloads per activity
+            activity_counts: Downloaded and failed activities
+            format_counts: Downloaded files per format
+        """
+        if downloaded:
+            self.state.mark_downloaded(activity.activity_id, [fmt.value])
+            self._record_download(activity.activity_id, {fmt.value})
+            format_counts[fmt.value] += 1
         
+        progress = in_progress.setdefault(activity.activity_id, Counter())
+        progress["files"] += 1
+        progress["downloaded"] += downloaded
+        if progress["files"] == file_count:
+            del in_progress[activity.activity_id]
+            self._save_metadata(activity)
+            if progress["downloaded"]:
+                activity_counts["downloaded"] += 1
+            else:
+                activity_counts["failed"] += 1
+    
+    def _list_activities(
+        self,
+        pending: queue.Queue,
+        results: queue.Queue,
+        counts: Counter,
+        abort: threading.Event,
+    ) -> None:
+        """Pipeline stage 1: queue every file that still needs a download.
+        
+        Queue items are ``(activity, format, number of files queued for the
+        activity)``.
+        
+        Runs on its own thread, which is the only writer of ``counts`` until
+        it finishes. Listing errors are forwarded to ``results``.
+        """
         try:
-            all_activities = self.client.get_activities(limit=200)
-            stats["activities_found"] = len(all_activities)
+            wanted_formats = {fmt.value for fmt in self.formats}
+            known_ids = None
+            if self._legacy_state and not self.full_scan:
+                logger.info("State file is from an older version, checking all activities once")
+            elif not self.full_scan:
+                known_ids = {
+                    activity_id
+                    for activity_id, formats in self.state.downloaded_formats.items()
+                    if wanted_formats <= formats
+                }
             
-            logger.info(f"Found {len(all_activities)} total activities")
+            # Pages shift when an activity syncs during the listing, so an
+            # activity can be listed twice. Its downloads may still be pending
+            # and not in the state yet, so repeats are skipped by ID.
+            seen: set[str] = set()
             
-            for activity in all_activities:
-                if activity.activity_id in self.state.downloaded_activity_ids:
+            # Downloads start while later pages are still being listed; a full
+            # queue blocks the listing until the downloads catch up
+            for activity in self.client.iter_activities(limit=200, known_ids=known_ids):
+                if abort.is_set():
+                    break
+                if activity.activity_id in seen:
+                    logger.debug(f"Skipping activity {activity.activity_id} listed twice")
+                    continue
+                seen.add(activity.activity_id)
+                
+                counts["found"] += 1
+                done = self.state.downloaded_formats.get(activity.activity_id, frozenset())
+                missing = self._missing_formats(activity, done)
+                if not missing:
                     logger.debug(f"Skipping already-backed-up activity {activity.activity_id}")
-                    stats["activities_skipped"] += 1
+                    counts["skipped"] += 1
                     continue
                 
-                if self._download_activity_files(activity):
-                    self.state.downloaded_activity_ids.add(activity.activity_id)
-                    self.state.last_synced_activity_id = activity.activity_id
-                    self.state.total_activities_backed_up += 1
-                    stats["activities_downloaded"] += 1
-                else:
-                    stats["activities_failed"] += 1
+                for fmt in missing:
+                    pending.put((activity, fmt, len(missing)))
             
-            # Update backup timestamp and save state
-            self.state.last_backup_timestamp = datetime.now()
-            self._save_state()
-            
-            logger.info(f"Backup completed: {stats['activities_downloaded']} new, "
-                       f"{stats['activities_skipped']} skipped, {stats['activities_failed']} failed")
-            
-            return stats
+            logger.info(f"Found {counts['found']} total activities")
+        except Exception as e:
+            results.put((None, None, 0, e))
+        finally:
+            # One end marker per download thread
+            for _ in range(self.max_workers):
+                pending.put(_STAGE_DONE)
+    
+    def _download_activities(
+        self,
+        pending: queue.Queue,
+        results: queue.Queue,
+        abort: threading.Event,
+    ) -> None:
+        """Pipeline stage 2: download queued files until the end marker.
+        
+        Runs on each download thread. Once the backup is aborting, remaining
+        files are drained from the queue without being downloaded.
+        """
+        while True:
+            item = pending.get()
+            if item is _STAGE_DONE:
+                results.put(_STAGE_DONE)
+                return
+            if abort.is_set():
+                continue
             
-        except CorosAPIError as e:
-            logger.error(f"Backup failed: {e}")
-            raise
+            activity, fmt, file_count = item
+            # True/False for a finished download, or the error it raised
+            outcome: Union[bool, Exception]
+            try:
+                outcome = self._download_activity_file(activity, fmt)
+            except Exception as e:
+                outcome = e
+            results.put((activity, fmt, file_count, outcome))
     
-    def _download_activity_files(self, activity: ActivitySummary) -> bool:
-        """Download and save activity files.
+    def _save_metadata(self, activity: ActivitySummary) -> None:
+        """Write the activity summary next to the downloaded files.
         
         Args:
-            activity: Activity to download
-            
-        Returns:
-            True if at least one file was downloaded successfully
+            activity: Activity to save metadata for
         """
-        success = False
-
-        self.backup_dir.mkdir(parents=True, exist_ok=True)
-  
-        filename_prefix = self.backup_dir / f"{activity.start_time.strftime('%Y-%m-%d')}_{activity.activity_id}"
+        metadata_file = f"{self._filename_prefix(activity)}-metadata.json"
+        if self._zstd is None:
+            data = _json.dumps(activity.to_dict(), indent=True)
+        else:
+            metadata_file += ".zst"
+            data = self._zstd.compress(_json.dumps(activity.to_dict()))
         
-        metadata_file = f"{filename_prefix}-metadata.json"
         try:
-            with open(metadata_file, "w") as f:
-                json.dump(activity.model_dump(mode="json"), f, indent=2, default=str)
+            with open(metadata_file, "wb") as f:
+                f.write(data)
             logger.debug(f"Saved metadata to {metadata_file}")
         except IOError as e:
             logger.warning(f"Failed to save metadata: {e}")
+    
+    def _filename_prefix(self, activity: ActivitySummary) -> Path:
+        """Return the common path prefix of all files of an activity."""
+        return self.backup_dir / f"{activity.start_time.strftime('%Y-%m-%d')}_{activity.activity_id}"
+    
+    def _missing_formats(self, activity: ActivitySummary, done: AbstractSet[str]) -> list[ExportFormat]:
+        """Return the requested formats that still have to be downloaded.
+        
+        Formats that are recorded in the state and present on disk are
+        not downloaded again.
+        
+        Args:
+            activity: Activity to check
+            done: Format values recorded as downloaded for the activity
+        """
+        filename_prefix = self._filename_prefix(activity)
+        return [
+            fmt for fmt in self.formats
+            if not (fmt.value in done and os.path.exists(f"{filename_prefix}.{fmt.value}"))
+        ]
+    
+    def _download_activity_file(self, activity: ActivitySummary, fmt: ExportFormat) -> bool:
+        """Download and save one file of an activity.
+        
+        Called from download worker threads.
         
-        # Download activity in each requested format
-        for fmt in self.formats:            
-            file_ext = fmt.value
-            output_file = f"{filename_prefix}.{file_ext}"
+        Args:
+            activity: Activity to download
+            fmt: Export format to download
             
-            try:
-                self.client.download_activity_file(
-                    activity.activity_id,
-                    activity.activity_type,
-                    fmt,
-                    str(output_file),
-                )
-                logger.info(f"Downloaded {fmt.value} for {activity.activity_id}")
-                success = True
-                
-                if fmt.value not in stats["formats_downloaded"]:
-                    stats["formats_downloaded"][fmt.value] = 0
-                stats["formats_downloaded"][fmt.value] += 1
-                
-            except CorosAPIError as e:
-                logger.warning(f"Failed to download {fmt.value}: {e}")
+        Returns:
+            True if the file was downloaded successfully
+        """
+        output_file = f"{self._filename_prefix(activity)}.{fmt.value}"
+        
+        try:
+            if not self.client.download_activity_file(
+                activity.activity_id,
+                activity.activity_type,
+                fmt,
+                output_file,
+            ):
+                logger.warning(f"No {fmt.value} file available for {activity.activity_id}")
+                return False
+        except CorosAPIError as e:
+            logger.warning(f"Failed to download {fmt.value}: {e}")
+            return False
         
-        return success
+        logger.info(f"Downloaded {fmt.value} for {activity.activity_id}")
+        return True
     
     def get_backup_stats(self) -> dict:
         """Get current backup statistics.
@@ -1,5 +1,6 @@
 """Command-line interface for coros-backup."""
 
+import importlib.util
 import sys
 import logging
 from pathlib import Path
@@ -12,9 +13,10 @@ from corosexport.client import (
     CorosClient,
     CorosAuthError,
     CorosAPIError,
+    default_token_cache,
 )
-from corosexport.backup import BackupManager
-from corosexport.models import ExportFormat
+from corosexport.backup import BackupManager, DEFAULT_MAX_WORKERS
+from corosexport._enums import ExportFormat
 
 REGION_HOSTS = {
     "eu": "https://teameuapi.coros.com",
@@ -29,6 +31,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _token_cache_path(cache_token: bool) -> Optional[Path]:
+    """Return the token cache location to use, if --cache-token is set."""
+    if not cache_token:
+        return None
+    try:
+        return default_token_cache()
+    except RuntimeError as e:
+        raise click.UsageError(f"--cache-token needs a home directory: {e}") from e
+
+
+def _require_zstandard(ctx: click.Context, param: click.Parameter, value: bool) -> bool:
+    """Reject --compress-metadata when zstandard is not installed."""
+    if value and importlib.util.find_spec("zstandard") is None:
+        raise click.BadParameter(
+            "requires zstandard: pip install 'corosexport[zstd]'", ctx=ctx, param=param
+        )
+    return value
+
+
 @click.command()
 @click.option(
     "--backup-dir",
@@ -62,10 +83,33 @@ logger = logging.getLogger(__name__)
 @click.option(
     "--format",
     multiple=True,
-    type=click.Choice(["fit", "tcx", "gpx", "json"], case_sensitive=False),
+    type=click.Choice([fmt.value for fmt in ExportFormat], case_sensitive=False),
     default=["fit", "tcx"],
     help="Export formats to download (can be used multiple times)",
 )
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Number of files to download in parallel",
+)
+@click.option(
+    "--full-scan",
+    is_flag=True,
+    help="Check all activities, not just the ones newer than the last backup",
+)
+@click.option(
+    "--compress-metadata",
+    is_flag=True,
+    callback=_require_zstandard,
+    help="Write metadata files compressed with zstd (requires the zstandard package)",
+)
+@click.option(
+    "--cache-token",
+    is_flag=True,
+    help="Keep the access token in ~/.cache/corosexport/token.json to skip logging in on the next run",
+)
 @click.option(
     "--verbose",
     is_flag=True,
@@ -78,6 +122,10 @@ def main(
     region: str,
     base_url: Optional[str],
     format: tuple[str],
+    workers: int,
+    full_scan: bool,
+    compress_metadata: bool,
+    cache_token: bool,
     verbose: bool,
 ) -> int:
     """Backup Coros activities to local disk.
@@ -113,11 +161,14 @@ def main(
     else:
         client_base_url = REGION_HOSTS[region]
 
+    token_cache = _token_cache_path(cache_token)
+
     # Create client and authenticate
     try:
         click.echo("Authenticating with Coros...")
         client = CorosClient(email=email, password=password,
-                              base_url=client_base_url)
+                              base_url=client_base_url,
+                              token_cache=token_cache)
         client.authenticate()
     except CorosAuthError as e:
         click.echo(f"Authentication failed: {e}", err=True)
@@ -129,6 +180,9 @@ def main(
             client=client,
             backup_dir=Path(backup_dir),
             formats=formats,
+            max_workers=workers,
+            full_scan=full_scan,
+            compress_metadata=compress_metadata,
         )
         
         click.echo(f"Starting backup to {backup_dir}...")
@@ -1,11 +1,20 @@
 """Coros API client with real working endpoints."""
 
+import itertools
 import logging
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Container, Deque, Iterator, List, Optional, Dict, Any
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import bcrypt, hashlib
 
+from . import _json
 from .models import ActivitySummary, ActivityType, ExportFormat
 
 logger = logging.getLogger(__name__)
@@ -19,6 +28,38 @@ BROWSER_HEADERS = {
     "Content-Type": "application/json",
 }
 
+# Size of the HTTP connection pool, so parallel requests don't queue for a connection
+HTTP_POOL_SIZE = 32
+
+# Retries for rate limited (429) or failing GET requests. Retry-After is
+# honoured; after the last attempt the response is returned as is.
+HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    raise_on_status=False,
+)
+
+# Upper bound on activity list pages fetched concurrently
+MAX_PAGE_WORKERS = 8
+
+# Bytes copied per write when streaming activity files to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# How long a cached access token is reused; Coros doesn't report token lifetimes
+TOKEN_CACHE_TTL = 3600
+
+
+def default_token_cache() -> Path:
+    """Return the default location of the access token cache.
+    
+    Resolved on demand, as not every environment has a home directory.
+    
+    Raises:
+        RuntimeError: If the home directory can't be determined
+    """
+    return Path.home() / ".cache" / "corosexport" / "token.json"
+
 
 class CorosAuthError(Exception):
     pass
@@ -55,15 +96,36 @@ class CorosClient:
         password: str,
         base_url: str = "https://teameuapi.coros.com",
         timeout: int = 30,
+        token_cache: Optional[Path] = None,
     ):
+        """Initialize the client.
+        
+        Args:
+            email: Coros account email
+            password: Coros account password
+            base_url: API host of the account's region
+            timeout: Request timeout in seconds
+            token_cache: File to keep the access token in between runs, so
+                that authenticate() can skip the login while the token is
+                valid. Disabled if None.
+        """
         self.email = email
         self.password = password
         self.auth_endpoint = f"{base_url}/account/login"
         self.activities_endpoint = f"{base_url}/activity/query"
         self.download_endpoint = f"{base_url}/activity/detail/download"
         self.timeout = timeout
+        self.token_cache = Path(token_cache) if token_cache is not None else None
         self.session = requests.Session()
         self.session.headers.update(BROWSER_HEADERS)
+        self.session.headers["Connection"] = "keep-alive"
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=HTTP_RETRY,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.accesstoken: Optional[str] = None
         self.user_id: Optional[str] = None
 
@@ -87,8 +149,87 @@ class CorosClient:
             else:
                 raise CorosAPIError(f"API error (code {result_code}): {error_message}")
 
+    def _auth_headers(self) -> Dict[str, str]:
+        """Headers that authenticate an API request."""
+        if self.accesstoken is None:
+            raise CorosAPIError("Not authenticated. Call authenticate() first.")
+        return {
+            "accesstoken": self.accesstoken,
+            "yfheader": f'{{"userId":"{self.user_id}"}}'
+        }
+
+    def _set_access_token(self, accesstoken: str, user_id: str) -> None:
+        """Use an access token for all further requests."""
+        self.accesstoken = accesstoken
+        self.user_id = user_id
+        self.session.cookies["CPL-coros-token"] = self.accesstoken
+        #self.session.cookies["CPL-coros-region"] = "3"
+
+    def _load_cached_token(self) -> bool:
+        """Restore the access token from the token cache.
+        
+        The token is only used if it belongs to this account and host, has
+        not expired, and is still accepted by the API.
+        
+        Returns:
+            True if a valid cached token was restored
+        """
+        if self.token_cache is None:
+            return False
+        try:
+            cached = _json.loads(self.token_cache.read_bytes())
+            if (
+                cached["account"] != self.email
+                or cached["authEndpoint"] != self.auth_endpoint
+                or cached["expires"] <= time.time()
+            ):
+                return False
+            self._set_access_token(cached["accessToken"], str(cached["userId"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        try:
+            # Cheapest authenticated request to check the token
+            self._fetch_activity_page({"size": 1, "pageNumber": 1, "modeList": ""}, self._auth_headers())
+        except (CorosAuthError, CorosAPIError, requests.RequestException) as e:
+            logger.info(f"Cached access token is no longer valid: {e}")
+            self.accesstoken = None
+            self.user_id = None
+            self.session.cookies.pop("CPL-coros-token", None)
+            return False
+        return True
+
+    def _save_cached_token(self) -> None:
+        """Write the current access token to the token cache."""
+        if self.token_cache is None:
+            return
+        data = {
+            "account": self.email,
+            "authEndpoint": self.auth_endpoint,
+            "accessToken": self.accesstoken,
+            "userId": self.user_id,
+            "expires": time.time() + TOKEN_CACHE_TTL,
+        }
+        try:
+            self.token_cache.parent.mkdir(parents=True, exist_ok=True)
+            # The token grants account access, so keep it private to the user
+            fd = os.open(self.token_cache, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(_json.dumps(data))
+            os.chmod(self.token_cache, 0o600)
+        except OSError as e:
+            logger.warning(f"Failed to cache access token: {e}")
+
     def authenticate(self) -> bool:
-        """Authenticate with real Coros API."""
+        """Authenticate with real Coros API.
+        
+        With a token cache configured, a still valid cached access token is
+        reused instead of logging in again.
+        """
+        if self.token_cache is not None and self._load_cached_token():
+            logger.info("✅ Reusing cached access token")
+            return True
+
         logger.info(f"Authenticating with Coros as {self.email}")
 
         # replicate: r = genSaltSync(10); c = hashSync(ke(o), r)
@@ -113,10 +254,9 @@ class CorosClient:
                     f"Auth failed: {data.get('message', 'Unknown error')}"
                 )
 
-            self.accesstoken = data["data"]["accessToken"]
-            self.user_id = str(data["data"]["userId"])
-            self.session.cookies["CPL-coros-token"] = self.accesstoken
-            #self.session.cookies["CPL-coros-region"] = "3"
+            self._set_access_token(data["data"]["accessToken"], str(data["data"]["userId"]))
+            if self.token_cache is not None:
+                self._save_cached_token()
 
             logger.info("✅ Authentication successful")
             return True
@@ -124,87 +264,203 @@ class CorosClient:
         except requests.RequestException as e:
             raise CorosAuthError(f"Network error: {e}") from e
 
-    def get_activities(self, limit: int = 200) -> List[ActivitySummary]:
-        if not self.accesstoken:
-            raise CorosAPIError("Not authenticated. Call authenticate() first.")
+    def _fetch_activity_page(self, params: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        """Fetch a single page of the activity list.
         
-        limit = 200 if limit > 200 else limit
-
-        params = {"size": limit, "pageNumber": 1, "modeList": ""}
-        headers = {
-            "accesstoken": self.accesstoken,
-            "yfheader": f'{{"userId":"{self.user_id}"}}'
-        }
-        response = self.session.get(self.activities_endpoint, params=params, headers=headers)
+        Args:
+            params: Query parameters, including the page number
+            headers: Authentication headers
+            
+        Returns:
+            The ``data`` object of the response
+            
+        Raises:
+            CorosAPIError: If the response is not valid JSON or reports an error
+        """
+        response = self.session.get(
+            self.activities_endpoint, params=params, headers=headers, timeout=self.timeout
+        )
         response.raise_for_status()
         
-        data = response.json()
+        # Decode the body with orjson when available; pages are the bulk of
+        # the JSON this client parses
+        try:
+            data = _json.loads(response.content)
+        except ValueError as e:
+            raise CorosAPIError(f"Invalid activity list response: {e}") from e
         self._check_api_response(data)
+        page: Dict[str, Any] = data.get("data", {})
+        return page
 
-        total_pages = data.get("data", {}).get("totalPage", 1)
-
-        all_coros_activities = []
-        all_coros_activities.extend(data.get("data", {}).get("dataList", []))
-
-        for page in range(2, total_pages + 1):
-            params["pageNumber"] = page
-            response = self.session.get(self.activities_endpoint, params=params, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            self._check_api_response(data)
-            all_coros_activities.extend(data.get("data", {}).get("dataList", []))
+    @staticmethod
+    def _is_known_page(page: Dict[str, Any], known_ids: Container[str]) -> bool:
+        """Check whether every activity on a page is in ``known_ids``."""
+        return all(str(act.get("labelId")) in known_ids for act in page.get("dataList", []))
 
+    def _parse_activities(self, all_coros_activities: List[Dict[str, Any]]) -> List[ActivitySummary]:
+        """Turn raw activity list entries into activity summaries.
+        
+        Args:
+            all_coros_activities: ``dataList`` entries of an activity list page
+            
+        Returns:
+            Summaries of all entries that could be parsed
+        """
         activities = []
         for act in all_coros_activities:
             try:
-                summary = ActivitySummary(
-                    activity_id=str(act["labelId"]),
-                    activity_name=act.get("name", "Unnamed"),
-                    activity_type=ActivityType.from_sport_type(act.get("sportType", 999)),
-                    start_time=datetime.fromtimestamp(act["startTime"]),
-                    end_time=datetime.fromtimestamp(act["endTime"]),
-                    workout_seconds=act.get("workoutTime", 0),
-                    total_seconds=act.get("totalTime", 0),
-                    distance_meters=float(act.get("distance", 0)) 
-                )
+                summary = ActivitySummary.from_api(act)
+            except ValueError as e:
+                logger.warning(f"Failed to parse activity: {e}")
+                continue
 
-                if summary.activity_type == ActivityType.OTHER:
-                    logger.warning(f"Unknown activity type code {act.get('sportType', 'N/A')} for activity {summary.activity_id}. This will probably cause issues when downloading files for this activity.")
+            if summary.activity_type == ActivityType.OTHER:
+                logger.warning(f"Unknown activity type code {act.get('sportType', 'N/A')} for activity {summary.activity_id}. This will probably cause issues when downloading files for this activity.")
 
-                activities.append(summary)
-            except Exception as e:
-                logger.warning(f"Failed to parse activity: {e}")
+            activities.append(summary)
         
         return activities
 
+    def iter_activities(
+        self, limit: int = 200, known_ids: Optional[Container[str]] = None
+    ) -> Iterator[ActivitySummary]:
+        """Yield activity summaries page by page, newest first.
+        
+        Without ``known_ids``, pages after the first are fetched concurrently,
+        but at most ``MAX_PAGE_WORKERS`` pages are fetched ahead of the caller,
+        so memory use doesn't grow with the number of activities. With
+        ``known_ids``, a page is only requested once the previous one turned
+        out to contain new activities.
+        
+        Args:
+            limit: Page size used when paging through the activity list (max 200)
+            known_ids: Activity IDs the caller already has. Since the list is
+                sorted newest first, paging stops after the first page that
+                only contains known activities.
+                
+        Yields:
+            Activity summaries
+        """
+        if not self.accesstoken:
+            raise CorosAPIError("Not authenticated. Call authenticate() first.")
+        
+        limit = 200 if limit > 200 else limit
+
+        params = {"size": limit, "pageNumber": 1, "modeList": ""}
+        headers = self._auth_headers()
+        page = self._fetch_activity_page(params, headers)
+        total_pages = page.get("totalPage", 1)
+
+        yield from self._parse_activities(page.get("dataList", []))
+
+        if known_ids is not None and self._is_known_page(page, known_ids):
+            logger.debug("No new activities on the first page, not fetching further pages")
+            return
+
+        if total_pages <= 1:
+            return
+
+        # The page count is known after page 1, so fetch the rest concurrently.
+        # When paging may stop early, fetching ahead would mostly request
+        # pages that are never needed, so fetch one page at a time then.
+        page_numbers = iter(range(2, total_pages + 1))
+        workers = 1 if known_ids is not None else min(MAX_PAGE_WORKERS, total_pages - 1)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        fetches: Deque[Future] = deque()
+
+        def fetch_next_pages(count: int) -> None:
+            for number in itertools.islice(page_numbers, count):
+                fetches.append(executor.submit(
+                    self._fetch_activity_page, dict(params, pageNumber=number), headers
+                ))
+
+        try:
+            fetch_next_pages(workers)
+            # Futures are consumed in submission order, which keeps the pages in order
+            while fetches:
+                page = fetches.popleft().result()
+                # Everything older than a fully known page is known as well
+                last_page = known_ids is not None and self._is_known_page(page, known_ids)
+                if not last_page:
+                    fetch_next_pages(1)
+                yield from self._parse_activities(page.get("dataList", []))
+                if last_page:
+                    break
+        finally:
+            # Also runs when the caller stops iterating early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_activities(
+        self, limit: int = 200, known_ids: Optional[Container[str]] = None
+    ) -> List[ActivitySummary]:
+        """Fetch activity summaries, newest first.
+        
+        See iter_activities() for the arguments.
+        
+        Returns:
+            List of activity summaries
+        """
+        return list(self.iter_activities(limit=limit, known_ids=known_ids))
+
+    @staticmethod
+    def _save_response(response: requests.Response, output_path: str) -> None:
+        """Stream the body of a ``stream=True`` response to a file.
+        
+        The body goes to a ``.part`` file first, which is only moved into
+        place once it is complete, so an interrupted download never leaves
+        a truncated file behind.
+        """
+        part_path = f"{output_path}.part"
+        # Copy from the raw stream to skip iter_content's per-chunk bytes objects
+        response.raw.decode_content = True
+        try:
+            with open(part_path, "wb") as f:
+                shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+        except Exception:
+            try:
+                os.unlink(part_path)
+            except OSError:
+                pass
+            raise
+        os.replace(part_path, output_path)
+
     def download_activity_file(
         self, activity_id: str, activity_type: ActivityType, file_format: ExportFormat, output_path: str
     ) -> bool:
-        """Download activity file."""
+        """Download activity file.
+        
+        Returns:
+            True if the file was saved, False if Coros returned no file URL
+        """
         if not self.accesstoken:
             raise CorosAPIError("Not authenticated.")
         
         params = {"labelId": activity_id, "sportType": activity_type.to_sport_type(), "fileType": file_format.to_file_type()}
-        headers = {
-            "accesstoken": self.accesstoken,
-            "yfheader": f'{{"userId":"{self.user_id}"}}'
-        }
-        response = self.session.get(self.download_endpoint, params=params, headers=headers)
-        response.raise_for_status()
-        
-        # Check if response is JSON (error response) or binary (file content)
-        content_type = response.headers.get("Content-Type", "")
-        if "application/json" in content_type:
+        headers = self._auth_headers()
+        # Streamed, so a file returned inline goes straight to disk
+        with self.session.get(
+            self.download_endpoint, params=params, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            
+            # A JSON response points to the file (or reports an error),
+            # anything else is the file content itself
+            content_type = response.headers.get("Content-Type", "")
+            if "application/json" not in content_type:
+                self._save_response(response, output_path)
+                return True
+            
             data = response.json()
-            self._check_api_response(data)
-
+        
+        self._check_api_response(data)
         file_url = data.get("data", {}).get("fileUrl", None)
         if file_url is None:
             return False
         
-        response = self.session.get(file_url, params=params, headers=headers)
-        response.raise_for_status()
-        
-        with open(output_path, "wb") as f:
-            f.write(response.content)
-        return True
\ No newline at end of file
+        # Stream the file to disk instead of holding it in memory
+        with self.session.get(
+            file_url, params=params, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            self._save_response(response, output_path)
+        return True
@@ -1,141 +1,181 @@
 """Data models for Coros activities and metadata."""
 
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime
-from enum import Enum
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Any, Dict, FrozenSet, Iterable, KeysView, Optional
 
+from ._enums import ActivityType
+from ._enums import ExportFormat as ExportFormat  # re-exported for client.py and callers
 
-# Mapping from Coros sport type codes to ActivityType string names
-_SPORT_TYPE_MAP = {
-    100: "RUNNING",
-    101: "TRAIL_RUNNING",
-    200: "CYCLING",
-    201: "MOUNTAIN_BIKING",
-    203: "GRAVEL_BIKING",
-    204: "MOUNTAIN_BIKING",
-    300: "SWIMMING",
-    301: "POOL_SWIM",
-    104: "HIKING",
-    400: "GYM_CARDIO",
-    402: "STRENGTH",
-    904: "YOGA",
-    500: "TRIATHLON",
-    10000: "TRIATHLON",
-}
+# __slots__ drop the per-instance __dict__; dataclass(slots=...) needs 3.10
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-_FILE_TYPE_MAP = {
-    0: "csv",
-    1: "gpx",
-    2: "kml",
-    3: "tcx",
-    4: "fit",
-}
 
-class ActivityType(str, Enum):
-    """Supported Coros activity types (using Coros sport type codes)."""
-    RUNNING = "RUNNING"
-    TRAIL_RUNNING = "TRAIL_RUNNING"
-    CYCLING = "CYCLING"
-    MOUNTAIN_BIKING = "MOUNTAIN_BIKING"
-    GRAVEL_BIKING = "GRAVEL_BIKING"
-    SWIMMING = "SWIMMING"
-    POOL_SWIM = "POOL_SWIM"
-    HIKING = "HIKING"
-    GYM_CARDIO = "GYM_CARDIO"
-    STRENGTH = "STRENGTH"
-    YOGA = "YOGA"
-    TRIATHLON = "TRIATHLON"
-    OTHER = "OTHER"
+def _time_from_timestamp(value: float) -> datetime:
+    """Coros returns times as epoch seconds; keep them as local datetimes."""
+    try:
+        return datetime.fromtimestamp(value)
+    except (OverflowError, OSError) as e:
+        raise ValueError(f"Invalid timestamp {value}: {e}") from e
+
+
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
+class ActivitySummary:
+    """Summary metadata of a Coros activity.
     
-    @classmethod
-    def from_sport_type(cls, sport_type: int) -> "ActivityType":
-        type_name = _SPORT_TYPE_MAP.get(sport_type, "OTHER")
-        return cls(type_name)
+    Summaries are immutable and hashable.
     
-    def to_sport_type(self) -> Optional[int]:
-        for code, name in _SPORT_TYPE_MAP.items():
-            if name == self.value:
-                return code
-        return None
+    Attributes:
+        activity_id: Unique activity identifier
+        start_time: When the activity started (local time)
+        end_time: When the activity ended (local time)
+        activity_name: Name/title of the activity
+        activity_type: Type of activity
+        workout_seconds: Activity duration in seconds
+        total_seconds: Activity duration in seconds, including pauses
+        distance_meters: Total distance in meters
+    """
+    activity_id: str
+    start_time: datetime
+    end_time: datetime
+    activity_name: str = "Unnamed"
+    activity_type: ActivityType = ActivityType.OTHER
+    workout_seconds: int = 0
+    total_seconds: int = 0
+    distance_meters: float = 0.0
     
     @classmethod
-    def _missing_(cls, value):
-        """Return OTHER for unknown activity types."""
-        return cls.OTHER
-
-class ExportFormat(str, Enum):
-    """Supported export formats."""
-    CSV = "csv"
-    GPX = "gpx"
-    KML = "kml"
-    TCX = "tcx"
-    FIT = "fit"
-
-    @classmethod
-    def from_file_type(cls, sport_type: int) -> "ActivityType":
-        type_name = _FILE_TYPE_MAP.get(sport_type, "OTHER")
-        return cls(type_name)
+    def from_api(cls, data: Dict[str, Any]) -> "ActivitySummary":
+        """Build a summary from a raw entry of the Coros activity list.
+        
+        Args:
+            data: Activity dict (``labelId``, ``sportType``, epoch timestamps)
+            
+        Returns:
+            The activity summary
+            
+        Raises:
+            ValueError: If a required field is missing or malformed
+        """
+        try:
+            return cls(
+                activity_id=sys.intern(str(data["labelId"])),
+                start_time=_time_from_timestamp(data["startTime"]),
+                end_time=_time_from_timestamp(data["endTime"]),
+                activity_name=data.get("name") or "Unnamed",
+                activity_type=ActivityType.from_sport_type(data.get("sportType", 0)),
+                workout_seconds=int(data.get("workoutTime", 0)),
+                total_seconds=int(data.get("totalTime", 0)),
+                distance_meters=float(data.get("distance", 0.0)),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid activity {data.get('labelId', 'N/A')}: {e!r}") from e
     
-    def to_file_type(self) -> Optional[int]:
-        for code, name in _FILE_TYPE_MAP.items():
-            if name == self.value:
-                return code
-        return None
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the summary as a JSON-serializable dict."""
+        return {
+            "activity_id": self.activity_id,
+            "activity_name": self.activity_name,
+            "activity_type": self.activity_type.value,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "workout_seconds": self.workout_seconds,
+            "total_seconds": self.total_seconds,
+            "distance_meters": self.distance_meters,
+        }
 
 
-class ActivitySummary(BaseModel):
-    """Summary metadata of a Coros activity."""
-    activity_id: str = Field(..., description="Unique activity identifier")
-    activity_name: str = Field(..., description="Name/title of the activity")
-    activity_type: ActivityType = Field(..., description="Type of activity")
-    start_time: datetime = Field(..., description="When the activity started (UTC)")
-    end_time: datetime = Field(..., description="When the activity started (UTC)")
-    workout_seconds: int = Field(..., description="Activity duration in seconds")
-    total_seconds: int = Field(..., description="Activity duration in seconds")
-    distance_meters: float = Field(..., description="Total distance in meters")
+@dataclass(**_DATACLASS_OPTIONS)
+class Activity:
+    """Complete activity data with details.
     
-    class Config:
-        use_enum_values = False
-
-
-class Activity(BaseModel):
-    """Complete activity data with details."""
+    Attributes:
+        summary: Summary metadata of the activity
+        avg_cadence: Average cadence (steps/min for running)
+        max_cadence: Max cadence
+        avg_power: Average power (watts, cycling)
+        max_power: Max power (watts)
+        total_ascent: Total elevation ascent
+        gps_points: GPS trackpoints (lat, lon, alt, time)
+        heart_rate_samples: HR sample data
+    """
     summary: ActivitySummary
     
     # Detailed metrics
-    avg_cadence: Optional[int] = Field(None, description="Average cadence (steps/min for running)")
-    max_cadence: Optional[int] = Field(None, description="Max cadence")
-    avg_power: Optional[float] = Field(None, description="Average power (watts, cycling)")
-    max_power: Optional[float] = Field(None, description="Max power (watts)")
-    total_ascent: Optional[float] = Field(None, description="Total elevation ascent")
+    avg_cadence: Optional[int] = None
+    max_cadence: Optional[int] = None
+    avg_power: Optional[float] = None
+    max_power: Optional[float] = None
+    total_ascent: Optional[float] = None
     
     # Raw data (if available)
-    gps_points: Optional[list] = Field(None, description="GPS trackpoints (lat, lon, alt, time)")
-    heart_rate_samples: Optional[list] = Field(None, description="HR sample data")
-    
-    class Config:
-        use_enum_values = False
+    gps_points: Optional[list] = None
+    heart_rate_samples: Optional[list] = None
 
 
-class BackupState(BaseModel):
-    """State information for incremental backups."""
-    last_backup_timestamp: datetime = Field(
-        ...,
-        description="When the last backup completed"
-    )
-    total_activities_backed_up: int = Field(
-        default=0,
-        description="Total activities successfully backed up"
-    )
-    last_synced_activity_id: Optional[str] = Field(
-        None,
-        description="Most recent activity ID from last backup"
-    )
-    downloaded_activity_ids: set[str] = Field(
-        default_factory=set,
-        description="Set of all activity IDs already downloaded"
-    )
+# One shared instance per distinct combination of formats. Most activities have
+# the same formats, and a small frozenset takes about 200 bytes on its own.
+_FORMAT_SETS: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+
+def _intern_formats(formats: Iterable[str]) -> FrozenSet[str]:
+    """Return the shared frozenset of the given export format values."""
+    formats = frozenset(formats)
+    return _FORMAT_SETS.setdefault(formats, formats)
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class BackupState:
+    """State information for incremental backups.
+    
+    Attributes:
+        last_backup_timestamp: When the last backup completed
+        total_activities_backed_up: Total activities successfully backed up
+        last_synced_activity_id: Most recent activity ID from last backup
+        downloaded_formats: Export formats already downloaded, by activity ID
+    """
+    last_backup_timestamp: datetime
+    total_activities_backed_up: int = 0
+    last_synced_activity_id: Optional[str] = None
+    downloaded_formats: dict[str, FrozenSet[str]] = field(default_factory=dict)
+    
+    def __post_init__(self) -> None:
+        # Interned IDs match the interned IDs of API summaries by identity
+        self.downloaded_formats = {
+            sys.intern(activity_id): _intern_formats(formats)
+            for activity_id, formats in self.downloaded_formats.items()
+        }
+    
+    @property
+    def downloaded_activity_ids(self) -> KeysView[str]:
+        """IDs of all activities with at least one downloaded file."""
+        return self.downloaded_formats.keys()
+    
+    def mark_downloaded(self, activity_id: str, formats: Iterable[str]) -> None:
+        """Record downloaded export formats of an activity.
+        
+        Args:
+            activity_id: ID of the downloaded activity
+            formats: Export format values (e.g. "fit") that were downloaded
+        """
+        done = self.downloaded_formats.get(activity_id)
+        if done is None:
+            activity_id = sys.intern(activity_id)
+            done = frozenset()
+            self.total_activities_backed_up += 1
+        # Replaced rather than updated in place, as the sets are shared
+        self.downloaded_formats[activity_id] = _intern_formats(done.union(formats))
+        self.last_synced_activity_id = activity_id
     
-    class Config:
-        arbitrary_types_allowed = True
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the state as a JSON-serializable dict."""
+        return {
+            "last_backup_timestamp": self.last_backup_timestamp.isoformat(),
+            "total_activities_backed_up": self.total_activities_backed_up,
+            "last_synced_activity_id": self.last_synced_activity_id,
+            "downloaded_formats": {
+                activity_id: sorted(formats)
+                for activity_id, formats in self.downloaded_formats.items()
+            },
+        }
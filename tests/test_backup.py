@@ -0,0 +1,129 @@
+"""Tests for resuming and migrating backups."""
+
+import json
+import threading
+from datetime import datetime
+
+from corosexport.backup import STATE_FILE_NAME, WAL_FILE_NAME, BackupManager
+from corosexport.client import CorosAPIError
+from corosexport.models import ActivitySummary, ActivityType, ExportFormat
+
+
+class FakeClient:
+    """Stands in for CorosClient, serving a fixed list of activities."""
+
+    def __init__(self, activity_ids, failing_ids=()):
+        self.activity_ids = list(activity_ids)
+        self.failing_ids = set(failing_ids)
+        self.downloads = []
+        self.known_ids = None
+        self._lock = threading.Lock()
+
+    def iter_activities(self, limit=200, known_ids=None):
+        self.known_ids = known_ids
+        for activity_id in self.activity_ids:
+            yield ActivitySummary(
+                activity_id=activity_id,
+                activity_name=f"Run {activity_id}",
+                activity_type=ActivityType.RUNNING,
+                start_time=datetime(2025, 1, 1, 8, 0),
+                end_time=datetime(2025, 1, 1, 9, 0),
+                workout_seconds=3600,
+                total_seconds=3600,
+                distance_meters=10000.0,
+            )
+
+    def download_activity_file(self, activity_id, activity_type, fmt, output_path):
+        with self._lock:
+            self.downloads.append((activity_id, fmt.value))
+        if activity_id in self.failing_ids:
+            raise CorosAPIError("Download failed")
+        with open(output_path, "wb") as f:
+            f.write(b"data")
+        return True
+
+
+def _activity_file(backup_dir, activity_id, fmt):
+    return backup_dir / f"2025-01-01_{activity_id}.{fmt}"
+
+
+def test_replays_journal_and_truncates_torn_line(tmp_path):
+    wal_file = tmp_path / WAL_FILE_NAME
+    wal_file.write_text("1 fit tcx\n2 fit\n3 fi")
+
+    manager = BackupManager(FakeClient([]), tmp_path)
+
+    assert manager.state.downloaded_formats == {
+        "1": frozenset({"fit", "tcx"}),
+        "2": frozenset({"fit"}),
+    }
+    assert wal_file.read_text() == "1 fit tcx\n2 fit\n"
+
+
+def test_journal_entry_after_torn_line_is_read_back(tmp_path):
+    (tmp_path / WAL_FILE_NAME).write_text("1 fit")
+
+    manager = BackupManager(FakeClient([]), tmp_path)
+    manager._record_download("2", {"fit", "tcx"})
+    manager._close_wal()
+
+    state = BackupManager(FakeClient([]), tmp_path).state
+    assert state.downloaded_formats == {"2": frozenset({"fit", "tcx"})}
+
+
+def test_migrates_legacy_state_file(tmp_path):
+    (tmp_path / STATE_FILE_NAME).write_text(json.dumps({
+        "last_backup_timestamp": "2025-01-02T00:00:00",
+        "total_activities_backed_up": 2,
+        "downloaded_activity_ids": ["1", "2"],
+    }))
+    for fmt in ("fit", "tcx"):
+        _activity_file(tmp_path, "1", fmt).write_bytes(b"data")
+    # Recorded as backed up, but its TCX file is missing on disk
+    _activity_file(tmp_path, "2", "fit").write_bytes(b"data")
+    client = FakeClient(["1", "2"])
+
+    manager = BackupManager(client, tmp_path)
+    assert manager.state.downloaded_formats == {
+        "1": frozenset({"fit", "tcx"}),
+        "2": frozenset({"fit", "tcx"}),
+    }
+
+    stats = manager.run_backup()
+
+    # The first backup after the migration lists all activities
+    assert client.known_ids is None
+    assert client.downloads == [("2", "tcx")]
+    assert stats["activities_skipped"] == 1
+    saved = json.loads((tmp_path / STATE_FILE_NAME).read_text())
+    assert sorted(saved["downloaded_formats"]) == ["1", "2"]
+
+
+def test_resumes_after_failed_download(tmp_path):
+    client = FakeClient(["1", "2"], failing_ids={"2"})
+    stats = BackupManager(client, tmp_path).run_backup()
+
+    assert stats["activities_downloaded"] == 1
+    assert stats["activities_failed"] == 1
+    assert not _activity_file(tmp_path, "2", "fit").exists()
+
+    client = FakeClient(["1", "2"])
+    stats = BackupManager(client, tmp_path).run_backup()
+
+    assert sorted(client.downloads) == [("2", "fit"), ("2", "tcx")]
+    assert stats["activities_downloaded"] == 1
+    assert stats["activities_skipped"] == 1
+
+
+def test_adds_format_to_existing_backup(tmp_path):
+    BackupManager(FakeClient(["1"]), tmp_path, formats=[ExportFormat.FIT]).run_backup()
+
+    client = FakeClient(["1"])
+    manager = BackupManager(client, tmp_path, formats=[ExportFormat.FIT, ExportFormat.GPX])
+    stats = manager.run_backup()
+
+    # Only activities that have every requested format count as known
+    assert client.known_ids == set()
+    assert client.downloads == [("1", "gpx")]
+    assert stats["activities_downloaded"] == 1
+    assert manager.state.downloaded_formats["1"] == frozenset({"fit", "gpx"})